@@ -1,19 +1,22 @@
+import asyncio
+
+from typing import Iterator
+
 import aiohttp
-from fastapi import FastAPI
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import UJSONResponse
+from starlette.datastructures import MutableHeaders
 from starlette.middleware.cors import CORSMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from core.globals import LLM_PROXY_ADDRESS
+from core.logger import info
 from core.repositories.files_repository import FilesRepository
-from core.routers.router_base import BaseRouter
-from core.routers.router_caps import CapsRouter
-from core.routers.router_chat_completions import ChatCompletionsRouter
-from core.routers.router_files import FilesRouter
-from core.routers.router_models import ModelsRouter
+from core.routers.router_auth import AuthCache
 
 __all__ = ["App"]
 
 from mcpl.repositories.repo_mcpl_servers import MCPLServersRepository
-from mcpl.routers.router_mcpl import MCPLRouter
 
 
 class App(FastAPI):
@@ -23,8 +26,9 @@ class App(FastAPI):
             mcpl_repository: MCPLServersRepository,
             *args, **kwargs
     ):
+        kwargs.setdefault("default_response_class", UJSONResponse)
         super().__init__(*args, **kwargs)
-        self.auth_cache = {}
+        self.auth_cache = AuthCache()
         self.files_repository = files_repository
         self.mcpl_repository = mcpl_repository
 
@@ -43,47 +47,99 @@ class App(FastAPI):
         self.add_middleware(NoCacheMiddleware)  # type: ignore[arg-type]
 
     async def _startup_events(self):
-        self.http_session = aiohttp.ClientSession()
+        # one session (and one connection pool) for every outbound call
+        self.http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=500,
+                limit_per_host=128,
+                ttl_dns_cache=300,
+                keepalive_timeout=75,
+            ),
+            # aiohttp's 5 minute default bounds every call, so a hung upstream can't hold
+            # a request and its pooled connection forever; streamed completions lift it per call
+            timeout=aiohttp.ClientTimeout(total=300, sock_connect=10),
+        )
         # Include routers after http_session is initialized
         for router in self._routers():
             self.include_router(router)
 
+        # in the background: an unreachable proxy must not hold up startup
+        self._warm_up_task = asyncio.create_task(self._warm_up_proxy())
+
+    async def _warm_up_proxy(self):
+        # resolves the proxy host and leaves a keep-alive connection in the pool,
+        # so the first real request skips the DNS lookup and the connect
+        try:
+            async with self.http_session.head(
+                    LLM_PROXY_ADDRESS,
+                    timeout=aiohttp.ClientTimeout(total=5),
+            ) as response:
+                info("LLM proxy warm-up: %s", response.status)
+        except Exception as e:
+            info("LLM proxy warm-up failed: %s", e)
+
     async def _shutdown_events(self):
+        if hasattr(self, '_warm_up_task'):
+            self._warm_up_task.cancel()
         if hasattr(self, 'http_session'):
             await self.http_session.close()
 
-    def _routers(self):
-        return [
-            BaseRouter(),
-            MCPLRouter(
-                self.mcpl_repository,
-                self.auth_cache,
-                self.http_session,
-            ),
-            CapsRouter(
-                self.mcpl_repository,
-                self.auth_cache,
-                self.http_session,
-            ),
-            ChatCompletionsRouter(
-                self.mcpl_repository,
-                self.auth_cache,
-                self.http_session,
-            ),
-            FilesRouter(
-                self.files_repository,
-                self.auth_cache,
-                self.http_session,
-            ),
-            ModelsRouter(
-                self.auth_cache,
-                self.http_session,
-            )
-        ]
-
-
-class NoCacheMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        response = await call_next(request)
-        response.headers["Cache-Control"] = "no-cache"
-        return response
+    def _routers(self) -> Iterator[APIRouter]:
+        # routers pull in most of the app (tools, mcpl, openai wrappers),
+        # so they are imported only when the startup hook includes them
+        from core.routers.router_base import BaseRouter
+        from core.routers.router_caps import CapsRouter
+        from core.routers.router_chat_completions import ChatCompletionsRouter
+        from core.routers.router_files import FilesRouter
+        from core.routers.router_models import ModelsRouter
+        from mcpl.routers.router_mcpl import MCPLRouter
+
+        yield BaseRouter()
+        yield MCPLRouter(
+            self.mcpl_repository,
+            self.auth_cache,
+            self.http_session,
+        )
+        yield CapsRouter(
+            self.mcpl_repository,
+            self.auth_cache,
+            self.http_session,
+        )
+        yield ChatCompletionsRouter(
+            self.mcpl_repository,
+            self.auth_cache,
+            self.http_session,
+        )
+        yield FilesRouter(
+            self.files_repository,
+            self.auth_cache,
+            self.http_session,
+        )
+        yield ModelsRouter(
+            self.auth_cache,
+            self.http_session,
+        )
+
+
+class NoCacheMiddleware:
+    """
+    Sets Cache-Control: no-cache on every HTTP response.
+
+    Plain ASGI rather than BaseHTTPMiddleware: only the response start message
+    is touched, so bodies (including streams) pass through untouched.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_no_cache(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["Cache-Control"] = "no-cache"
+            await send(message)
+
+        await self.app(scope, receive, send_no_cache)
@@ -3,24 +3,33 @@ from typing import List, Iterator
 from openai_wrappers.types import (
     ChatMessage,
     ChatMessageSystem,
-    ChatMessageTool,
-    ChatMessageAssistant,
     ToolCall
 )
 
 
 def get_unanswered_tool_calls(messages: List[ChatMessage]) -> Iterator[ToolCall]:
     # Get all tool call IDs from responses
-    tool_messages: List[ChatMessageTool] = [
-        m for m in messages if isinstance(m, ChatMessageTool)
-    ]
     answered_tool_call_ids = {
-        tool_call_id for m in tool_messages if (tool_call_id := m.tool_call_id)
+        m.tool_call_id for m in messages if m.role == "tool" and m.tool_call_id
     }
 
     # yield all unanswered tool calls
+    # (roles are compared instead of isinstance: each role maps to one model)
     for m in messages:
-        if isinstance(m, ChatMessageAssistant) and m.tool_calls:
+        if m.role == "assistant" and m.tool_calls:
             for tool_call in m.tool_calls:
                 if tool_call.id not in answered_tool_call_ids:
                     yield tool_call
+
+
+def get_messages_since_last_user_message(messages: List[ChatMessage]) -> List[ChatMessage]:
+    for idx in range(len(messages) - 1, -1, -1):
+        if messages[idx].role == "user":
+            return messages[idx + 1:]
+    return messages
+
+
+def has_unanswered_tool_calls(messages: List[ChatMessage]) -> bool:
+    # only tool calls made after the last user message are ever executed
+    recent = get_messages_since_last_user_message(messages)
+    return next(get_unanswered_tool_calls(recent), None) is not None
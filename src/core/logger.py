@@ -1,7 +1,11 @@
 import sys
+import time
+import queue
+import atexit
 import logging
 
-from datetime import datetime
+from datetime import datetime, time as dt_time, timedelta
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from termcolor import colored
 
@@ -13,20 +17,27 @@ __all__ = ['init_logger', 'info', 'error', 'warn', 'debug', 'exception']
 logger = logging.getLogger("LLMP")
 
 
+# Guarding on isEnabledFor skips record creation for suppressed levels.
+# Pass arguments %-style (info("x=%s", x)) so formatting is lazy as well.
 def info(msg, *args, **kwargs):
-    logger.info(msg, *args, **kwargs, stacklevel=2)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(msg, *args, **kwargs, stacklevel=2)
 
 def error(msg, *args, **kwargs):
-    logger.error(msg, *args, **kwargs, stacklevel=2)
+    if logger.isEnabledFor(logging.ERROR):
+        logger.error(msg, *args, **kwargs, stacklevel=2)
 
 def warn(msg, *args, **kwargs):
-    logger.warning(msg, *args, **kwargs, stacklevel=2)
+    if logger.isEnabledFor(logging.WARNING):
+        logger.warning(msg, *args, **kwargs, stacklevel=2)
 
 def debug(msg, *args, **kwargs):
-    logger.debug(msg, *args, **kwargs, stacklevel=2)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(msg, *args, **kwargs, stacklevel=2)
 
 def exception(msg, *args, **kwargs):
-    logger.exception(msg, *args, **kwargs, stacklevel=2)
+    if logger.isEnabledFor(logging.ERROR):
+        logger.exception(msg, *args, **kwargs, stacklevel=2)
 
 
 FMT = '%(asctime)s %(levelname)s [%(filename)s:%(lineno)d %(funcName)s] %(message)s'
@@ -40,6 +51,12 @@ EXCLUDED_FILENAMES = [
     'inotify_buffer.py',
 ]
 
+# Colored level names, built once instead of per emitted record
+COLORED_LEVELNAMES = {
+    logging.ERROR: colored("ERROR", "red"),
+    logging.WARNING: colored("WARNING", "yellow"),
+}
+
 
 def init_logger(debug_on: bool) -> None:
     """Initialize the application logger with console and file handlers.
@@ -59,18 +76,11 @@ def init_logger(debug_on: bool) -> None:
             if not debug_on and record.levelno == logging.DEBUG:
                 return
 
-            # Color the level name based on severity
-            level_colors = {
-                logging.ERROR: 'red',
-                logging.WARNING: 'yellow'
-            }
-
             # Save original level name
             original_levelname = record.levelname
 
-            # Apply color if needed
-            if record.levelno in level_colors:
-                record.levelname = colored(record.levelname, level_colors[record.levelno])
+            # Color the level name based on severity
+            record.levelname = COLORED_LEVELNAMES.get(record.levelno, original_levelname)
 
             # Format and output the log entry
             log_entry = self.format(record)
@@ -89,11 +99,19 @@ def init_logger(debug_on: bool) -> None:
             self.encoding = encoding
             self.current_date = None
             self.file_handler = None
+            # wall-clock time the current file stops being today's
+            self._rollover_at = 0.0
             # Initialize with the current file handler
             self._update_file_handler()
 
         def _update_file_handler(self):
-            today = datetime.now().strftime("%Y%m%d")
+            # the date only changes at midnight: one float compare per record until then
+            if self.file_handler is not None and time.time() < self._rollover_at:
+                return
+
+            now = datetime.now()
+            today = now.strftime("%Y%m%d")
+            self._rollover_at = datetime.combine(now.date() + timedelta(days=1), dt_time()).timestamp()
 
             if today != self.current_date or self.file_handler is None:
                 if self.file_handler:
@@ -122,16 +140,25 @@ def init_logger(debug_on: bool) -> None:
         FMT, DATE_FMT
     ))
 
+    # File writes happen on the listener thread, off the event loop
+    file_queue = queue.Queue(-1)
+    queue_handler = QueueHandler(file_queue)
+    # records are enqueued pre-merged; the file handler applies FMT
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    file_listener = QueueListener(file_queue, file_handler)
+    file_listener.start()
+    atexit.register(file_listener.stop)
+
     console_handler = ColoredConsoleHandler()
 
     # Add the exclude filter to both handlers
     exclude_filter = ExcludeFilter()
     console_handler.addFilter(exclude_filter)
-    file_handler.addFilter(exclude_filter)
+    queue_handler.addFilter(exclude_filter)
 
     logging.basicConfig(
         level=logging.DEBUG if debug_on else logging.INFO,
         format=FMT,
         datefmt=DATE_FMT,
-        handlers=[console_handler, file_handler]
+        handlers=[console_handler, queue_handler]
     )
@@ -2,7 +2,6 @@ import signal
 
 import asyncio
 
-import uvloop
 import uvicorn
 
 from core.args import parse_args
@@ -26,7 +25,9 @@ class Server(uvicorn.Server):
             app,
             host=host,
             port=port,
+            loop="uvloop",
             timeout_keep_alive=600,
+            backlog=2048,
             log_config=None
         )
         super().__init__(config)
@@ -41,7 +42,7 @@ class Server(uvicorn.Server):
 def setup_signal_handlers(server: Server):
     """Setup handlers for signals"""
     def handle_exit(signum, frame):
-        info(f"Received exit signal {signal.Signals(signum).name}")
+        info("Received exit signal %s", signal.Signals(signum).name)
         asyncio.create_task(server.shutdown())
 
     signal.signal(signal.SIGINT, handle_exit)
@@ -68,8 +69,6 @@ def main():
         openapi_url="/api/v1/openapi.json"
     )
 
-    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
-
     server = Server(
         app=app,
         host=args.host,
@@ -1,22 +1,48 @@
+import queue
 import asyncio
 import sqlite3
+import threading
 
 from functools import partial
 from contextlib import contextmanager
 from pathlib import Path
+from typing import Tuple
 
 
 class AbstractRepository:
+    # applied once to every pooled connection, when it is opened
+    PRAGMAS: Tuple[str, ...] = ()
+    # connections used at the same time; above 1 only pays off with WAL, where readers don't block
+    POOL_SIZE: int = 1
+
     def __init__(self, db_path: Path):
         self.db_path = db_path
+        # most recently used first: a warm connection (and its page cache) is reused
+        self._pool: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._pool_slots = threading.BoundedSemaphore(self.POOL_SIZE)
+
+    def _connect(self) -> sqlite3.Connection:
+        # opened in one executor thread, later used by others: one at a time
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            conn.execute(f"PRAGMA {pragma}")
+        return conn
 
     @contextmanager
     def _get_db_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        try:
-            yield conn
-        finally:
-            conn.close()
+        # at most POOL_SIZE holders, so at most POOL_SIZE connections are ever opened
+        with self._pool_slots:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            finally:
+                # never hand a half-finished transaction to the next caller
+                if conn.in_transaction:
+                    conn.rollback()
+                self._pool.put(conn)
 
     def _init_db(self):
         raise NotImplementedError("Subclasses must implement this method")
@@ -1,13 +1,112 @@
+import re
 import sqlite3
 from datetime import datetime
-from typing import List
+from functools import lru_cache
+from typing import List, AsyncIterator, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from core.repositories.abstract_repository import AbstractRepository
 
 
+# Column order of every SELECT, matching FileItem field names
+FILE_FIELDS = (
+    "file_name", "file_name_orig", "file_ext", "file_role", "file_size",
+    "user_id", "created_at", "file_type", "processing_status",
+)
+FILE_COLUMNS = ", ".join(FILE_FIELDS)
+
+# Statement texts are kept constant so sqlite3's per-connection statement cache
+# serves them from the shared connection without re-preparing
+SQL_INSERT_FILE = f"""
+INSERT INTO uploaded_files
+({FILE_COLUMNS})
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_UPDATE_FILE = """
+UPDATE uploaded_files
+SET file_name_orig = ?, file_ext = ?,
+    file_role = ?, file_size = ?, user_id = ?, created_at = ?, file_type = ?, processing_status = ?
+WHERE file_name = ?
+"""
+
+SQL_DELETE_FILE = "DELETE FROM uploaded_files WHERE file_name = ?"
+
+SQL_GET_USER_FILES = f"""
+SELECT {FILE_COLUMNS}
+FROM uploaded_files
+WHERE user_id = ?
+ORDER BY created_at DESC
+"""
+
+# file_name is the primary key, so this is a single index probe
+SQL_GET_USER_FILE = f"""
+SELECT {FILE_COLUMNS}
+FROM uploaded_files
+WHERE file_name = ? AND user_id = ?
+"""
+
+# Keyset page: rows strictly after (created_at, file_name) in listing order
+SQL_GET_USER_FILES_PAGE = f"""
+SELECT {FILE_COLUMNS}
+FROM uploaded_files
+WHERE user_id = ? AND (created_at, file_name) < (?, ?)
+ORDER BY created_at DESC, file_name DESC
+LIMIT ?
+"""
+
+USER_FILES_PAGE_SIZE = 512
+
+# Filters are `column op ?` comparisons over FILE_FIELDS, joined by AND / OR:
+# values can only come in through params
+FILTER_OPS = ("=", "!=", "<>", "<", "<=", ">", ">=", "LIKE")
+FILTER_CONDITION = re.compile(
+    r"^\s*(?:{columns})\s*(?:{ops})\s*\?\s*$".format(
+        columns="|".join(FILE_FIELDS),
+        # longest first, so "<=" isn't read as "<" followed by a stray "="
+        ops="|".join(re.escape(op) for op in sorted(FILTER_OPS, key=len, reverse=True)),
+    ),
+    re.IGNORECASE
+)
+FILTER_JOINER = re.compile(r"\s+(?:AND|OR)\s+", re.IGNORECASE)
+
+
+@lru_cache(maxsize=256)
+def filter_query(filter: str) -> str:
+    """
+    Build the SELECT for a get_files_by_filter WHERE clause.
+
+    Cached by filter text: repeated filters skip parsing and string building,
+    and hand sqlite3 the identical statement text its statement cache is keyed on.
+
+    Raises:
+        ValueError: If the filter is not `column op ?` comparisons joined by AND / OR
+    """
+    for condition in FILTER_JOINER.split(filter):
+        if not FILTER_CONDITION.match(condition):
+            raise ValueError(f"Unsupported filter condition: {condition!r}")
+
+    return f"""
+    SELECT {FILE_COLUMNS}
+    FROM uploaded_files
+    WHERE {filter}
+    ORDER BY created_at DESC
+    """
+
+
+def to_epoch_us(dt: datetime) -> int:
+    return round(dt.timestamp() * 1_000_000)
+
+
+def from_epoch_us(us: int) -> datetime:
+    # integer seconds keep float rounding out of the microseconds
+    return datetime.fromtimestamp(us // 1_000_000).replace(microsecond=us % 1_000_000)
+
+
 class FileItem(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     file_name: str
     file_name_orig: str
     file_ext: str
@@ -20,62 +119,97 @@ class FileItem(BaseModel):
 
 
 class FilesRepository(AbstractRepository):
+    PRAGMAS = (
+        "journal_mode=WAL",
+        "synchronous=NORMAL",
+        "temp_store=MEMORY",
+        "cache_size=-65536",  # 64 MiB
+        "mmap_size=268435456",  # 256 MiB
+        "busy_timeout=5000",
+    )
+    POOL_SIZE = 4
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._init_db()
 
     def _init_db(self):
         with self._get_db_connection() as conn:
-            # Check if columns exist
-            cursor = conn.execute("PRAGMA table_info(uploaded_files)")
-            columns = [info[1] for info in cursor.fetchall()]
-
-            # Create table if it doesn't exist
-            conn.execute("""
-            CREATE TABLE IF NOT EXISTS uploaded_files (
-                file_name TEXT PRIMARY KEY,
-                file_name_orig TEXT NOT NULL,
-                file_ext TEXT NOT NULL,
-                file_role TEXT NOT NULL,
-                file_size INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                created_at TIMESTAMP NOT NULL,
-                file_type TEXT DEFAULT '',
-                processing_status TEXT DEFAULT ''
-            )
-            """)
+            # Schema changes are applied in steps, tracked by PRAGMA user_version
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+            if version < 1:
+                # Create table if it doesn't exist
+                conn.execute("""
+                CREATE TABLE IF NOT EXISTS uploaded_files (
+                    file_name TEXT PRIMARY KEY,
+                    file_name_orig TEXT NOT NULL,
+                    file_ext TEXT NOT NULL,
+                    file_role TEXT NOT NULL,
+                    file_size INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    created_at INTEGER NOT NULL, -- epoch microseconds
+                    file_type TEXT DEFAULT '',
+                    processing_status TEXT DEFAULT ''
+                )
+                """)
+
+                # Tables created before these columns existed need them added
+                columns = [info[1] for info in conn.execute("PRAGMA table_info(uploaded_files)")]
+                if 'file_type' not in columns:
+                    conn.execute("ALTER TABLE uploaded_files ADD COLUMN file_type TEXT DEFAULT ''")
+                if 'processing_status' not in columns:
+                    conn.execute("ALTER TABLE uploaded_files ADD COLUMN processing_status TEXT DEFAULT ''")
 
-            # Add file_type column if it doesn't exist
-            if 'file_type' not in columns and 'uploaded_files' in columns:
-                conn.execute("ALTER TABLE uploaded_files ADD COLUMN file_type TEXT DEFAULT ''")
+                conn.execute("PRAGMA user_version = 1")
 
-            # Add processing_status column if it doesn't exist
-            if 'processing_status' not in columns and 'uploaded_files' in columns:
-                conn.execute("ALTER TABLE uploaded_files ADD COLUMN processing_status TEXT DEFAULT ''")
+            if version < 2:
+                # created_at used to be stored as ISO text: convert it to epoch microseconds.
+                # Done in Python, as the stored datetimes are naive local time
+                legacy_rows = conn.execute(
+                    "SELECT rowid, created_at FROM uploaded_files WHERE typeof(created_at) = 'text'"
+                ).fetchall()
+                if legacy_rows:
+                    conn.executemany(
+                        "UPDATE uploaded_files SET created_at = ? WHERE rowid = ?",
+                        [(to_epoch_us(datetime.fromisoformat(ts)), rowid) for rowid, ts in legacy_rows]
+                    )
+                conn.execute("PRAGMA user_version = 2")
+
+            if version < 3:
+                # serves get_user_files in order, without a table scan and sort
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS ix_files_user_created ON uploaded_files(user_id, created_at DESC)"
+                )
+                conn.execute("PRAGMA user_version = 3")
 
             conn.commit()
 
+    @staticmethod
+    def _insert_params(file: FileItem) -> tuple:
+        return (
+            file.file_name,
+            file.file_name_orig,
+            file.file_ext,
+            file.file_role,
+            file.file_size,
+            file.user_id,
+            to_epoch_us(file.created_at),
+            file.file_type,
+            file.processing_status
+        )
+
+    @staticmethod
+    def _row_to_file(row: tuple) -> FileItem:
+        # rows come from our own schema: skip pydantic validation
+        values = dict(zip(FILE_FIELDS, row))
+        values["created_at"] = from_epoch_us(values["created_at"])
+        return FileItem.model_construct(**values)
+
     def create_file_sync(self, file: FileItem) -> bool:
         with self._get_db_connection() as conn:
             try:
-                conn.execute(
-                    """
-                    INSERT INTO uploaded_files 
-                    (file_name, file_name_orig, file_ext, file_role, file_size, user_id, created_at, file_type, processing_status)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        file.file_name,
-                        file.file_name_orig,
-                        file.file_ext,
-                        file.file_role,
-                        file.file_size,
-                        file.user_id,
-                        file.created_at.isoformat(),
-                        file.file_type,
-                        file.processing_status
-                    )
-                )
+                conn.execute(SQL_INSERT_FILE, self._insert_params(file))
                 conn.commit()
                 return True
             except sqlite3.IntegrityError:
@@ -85,19 +219,14 @@ class FilesRepository(AbstractRepository):
         with self._get_db_connection() as conn:
             try:
                 cursor = conn.execute(
-                    """
-                    UPDATE uploaded_files
-                    SET file_name_orig = ?, file_ext = ?, 
-                        file_role = ?, file_size = ?, user_id = ?, created_at = ?, file_type = ?, processing_status = ?
-                    WHERE file_name = ?
-                    """,
+                    SQL_UPDATE_FILE,
                     (
                         file.file_name_orig,
                         file.file_ext,
                         file.file_role,
                         file.file_size,
                         file.user_id,
-                        file.created_at.isoformat(),
+                        to_epoch_us(file.created_at),
                         file.file_type,
                         file.processing_status,
                         file_name
@@ -111,10 +240,7 @@ class FilesRepository(AbstractRepository):
     def delete_file_sync(self, file_name: str) -> bool:
         with self._get_db_connection() as conn:
             try:
-                cursor = conn.execute(
-                    "DELETE FROM uploaded_files WHERE file_name = ?",
-                    (file_name,)
-                )
+                cursor = conn.execute(SQL_DELETE_FILE, (file_name,))
                 conn.commit()
                 return cursor.rowcount > 0
             except sqlite3.Error:
@@ -122,67 +248,64 @@ class FilesRepository(AbstractRepository):
 
     def get_user_files_sync(self, user_id: int) -> List[FileItem]:
         with self._get_db_connection() as conn:
-            cursor = conn.execute(
-                """
-                SELECT file_name, file_name_orig, file_ext, file_role, file_size, user_id, created_at, file_type, processing_status
-                FROM uploaded_files
-                WHERE user_id = ?
-                ORDER BY created_at DESC
-                """,
-                (user_id,)
-            )
+            cursor = conn.execute(SQL_GET_USER_FILES, (user_id,))
+
+            return [self._row_to_file(row) for row in cursor.fetchall()]
+
+    def get_file_sync(self, user_id: int, file_name: str) -> Optional[FileItem]:
+        """
+        Get a single file, provided it belongs to the user.
 
-            files = []
-            for row in cursor.fetchall():
-                files.append(FileItem(
-                    file_name=row[0],
-                    file_name_orig=row[1],
-                    file_ext=row[2],
-                    file_role=row[3],
-                    file_size=row[4],
-                    user_id=row[5],
-                    created_at=datetime.fromisoformat(row[6]),
-                    file_type=row[7] if len(row) > 7 else "",
-                    processing_status=row[8] if len(row) > 8 else ""
-                ))
-
-            return files
+        Returns:
+            The FileItem, or None if there is no such file or it belongs to another user
+        """
+        with self._get_db_connection() as conn:
+            row = conn.execute(SQL_GET_USER_FILE, (file_name, user_id)).fetchone()
+            return self._row_to_file(row) if row else None
+
+    def get_user_files_page_sync(
+            self,
+            user_id: int,
+            limit: int,
+            after: Tuple[int, str] = (2 ** 63 - 1, "")
+    ) -> List[FileItem]:
+        """
+        Get one page of a user's files, newest first.
+
+        Args:
+            user_id: Owner of the files
+            limit: Maximum number of files to return
+            after: (created_at epoch microseconds, file_name) of the last file of the
+                   previous page; the default starts from the newest file
+
+        Returns:
+            Up to `limit` FileItem objects
+        """
+        with self._get_db_connection() as conn:
+            cursor = conn.execute(SQL_GET_USER_FILES_PAGE, (user_id, *after, limit))
+            return [self._row_to_file(row) for row in cursor.fetchall()]
 
     def get_files_by_filter_sync(self, filter: str, params: tuple = ()) -> List[FileItem]:
         """
         Get files based on a custom filter expression.
 
         Args:
-            filter: SQL WHERE clause (without the 'WHERE' keyword)
+            filter: WHERE clause (without the 'WHERE' keyword) of `column op ?`
+                    comparisons joined by AND / OR; op is one of FILTER_OPS
             params: Parameters to be used with the filter expression
 
         Returns:
             List of FileItem objects matching the filter
+
+        Raises:
+            ValueError: If the filter is not `column op ?` comparisons over FileItem
+                        columns joined by AND / OR; values go through params
         """
+        query = filter_query(filter)
         with self._get_db_connection() as conn:
-            query = f"""
-            SELECT file_name, file_name_orig, file_ext, file_role, file_size, user_id, created_at, file_type, processing_status
-            FROM uploaded_files
-            WHERE {filter}
-            ORDER BY created_at DESC
-            """
             cursor = conn.execute(query, params)
 
-            files = []
-            for row in cursor.fetchall():
-                files.append(FileItem(
-                    file_name=row[0],
-                    file_name_orig=row[1],
-                    file_ext=row[2],
-                    file_role=row[3],
-                    file_size=row[4],
-                    user_id=row[5],
-                    created_at=datetime.fromisoformat(row[6]),
-                    file_type=row[7] if len(row) > 7 else "",
-                    processing_status=row[8] if len(row) > 8 else ""
-                ))
-
-            return files
+            return [self._row_to_file(row) for row in cursor.fetchall()]
 
     async def create_file(self, file: FileItem) -> bool:
         return await self._run_in_thread(self.create_file_sync, file)
@@ -193,9 +316,33 @@ class FilesRepository(AbstractRepository):
     async def delete_file(self, file_name: str) -> bool:
         return await self._run_in_thread(self.delete_file_sync, file_name)
 
+    async def get_file(self, user_id: int, file_name: str) -> Optional[FileItem]:
+        return await self._run_in_thread(self.get_file_sync, user_id, file_name)
+
     async def get_user_files(self, user_id: int) -> List[FileItem]:
         return await self._run_in_thread(self.get_user_files_sync, user_id)
 
+    async def iter_user_files(
+            self,
+            user_id: int,
+            page_size: int = USER_FILES_PAGE_SIZE
+    ) -> AsyncIterator[FileItem]:
+        """
+        Iterate over a user's files, newest first, fetching `page_size` rows at a time.
+
+        Only one page is held in memory, and the connection is released between pages.
+        """
+        page = await self._run_in_thread(self.get_user_files_page_sync, user_id, page_size)
+        while page:
+            for file in page:
+                yield file
+            if len(page) < page_size:
+                return
+            last = page[-1]
+            page = await self._run_in_thread(
+                self.get_user_files_page_sync, user_id, page_size, (to_epoch_us(last.created_at), last.file_name)
+            )
+
     async def get_files_by_filter(self, filter: str, params: tuple = ()) -> List[FileItem]:
         """
         Async version of get_files_by_filter_sync.
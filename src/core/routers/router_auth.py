@@ -1,6 +1,8 @@
 import re
 import time
+import hashlib
 
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
 
@@ -10,9 +12,10 @@ from fastapi import APIRouter, Header, Response
 
 from core.globals import LLM_PROXY_ADDRESS
 from core.logger import info
-from core.routers.schemas import error_constructor
+from core.routers.schemas import canned_error_response
 
 CACHE_ITEM_EXPIRATION_TIME = 360
+CACHE_MAX_ITEMS = 10_000
 
 
 MATCH_BEARER = re.compile(r"^Bearer\s+(.+)$")
@@ -30,11 +33,45 @@ class AuthItem:
 @dataclass
 class CacheAuthItem:
     item: AuthItem
-    cached_ts: float
+    expires_at: float  # time.monotonic() deadline
 
 
 def auth_s_left(item: CacheAuthItem):
-    return CACHE_ITEM_EXPIRATION_TIME - (time.time() - item.cached_ts)
+    return item.expires_at - time.monotonic()
+
+
+def auth_cache_key(api_key: str) -> str:
+    # raw API keys are never kept in memory as cache keys
+    return hashlib.sha256(api_key.encode()).hexdigest()[:32]
+
+
+class AuthCache(OrderedDict):
+    """
+    LRU of CacheAuthItem keyed by auth_cache_key, holding at most max_items entries.
+    Expired entries are dropped when they are looked up.
+    """
+    def __init__(self, max_items: int = CACHE_MAX_ITEMS):
+        super().__init__()
+        self.max_items = max_items
+
+    def get_live(self, key: str) -> Optional[CacheAuthItem]:
+        item = self.get(key)
+        if item is None:
+            return None
+        if item.expires_at <= time.monotonic():
+            del self[key]
+            return None
+        self.move_to_end(key)
+        return item
+
+    def put(self, key: str, item: AuthItem) -> None:
+        self[key] = CacheAuthItem(
+            item=item,
+            expires_at=time.monotonic() + CACHE_ITEM_EXPIRATION_TIME
+        )
+        self.move_to_end(key)
+        if len(self) > self.max_items:
+            self.popitem(last=False)
 
 
 async def fetch_auth_item(
@@ -54,44 +91,46 @@ async def fetch_auth_item(
 class AuthRouter(APIRouter):
     def __init__(
             self,
-            auth_cache,
+            auth_cache: AuthCache,
             http_session: aiohttp.ClientSession,
             *args, **kwargs
     ):
         super().__init__(*args, **kwargs)
         self.http_session: aiohttp.ClientSession = http_session
-        self.cache = auth_cache
+        self.cache: AuthCache = auth_cache
+        # Response holds no per-request state: middlewares copy the header list before editing it
+        self._auth_error = canned_error_response(401, "invalid_api_key")
 
     async def _check_auth(self, authorization: Header = None) -> Optional[AuthItem]:
         if not authorization:
             return
 
-        match = MATCH_BEARER.match(authorization)
-        if not match:
+        # almost every header is exactly "Bearer <key>": slice it, regex for the rest
+        if authorization.startswith("Bearer "):
+            api_key: str = authorization[7:].lstrip()
+        elif match := MATCH_BEARER.match(authorization):
+            api_key: str = match.group(1)
+        else:
+            return
+
+        if not api_key:
             return
 
-        api_key: str = match.group(1)
+        cache_key = auth_cache_key(api_key)
 
-        if item := self.cache.get(api_key):
-            s_left = auth_s_left(item)
-            if s_left > 0:
-                info(f"cache -> AUTH; exp:{s_left :.1f}s")
-                return item.item
+        if item := self.cache.get_live(cache_key):
+            info("cache -> AUTH; exp:%.1fs", auth_s_left(item))
+            return item.item
 
         a_item = await fetch_auth_item(self.http_session, authorization)
 
         if "auth" in a_item:
             item = AuthItem(**a_item["auth"])
-            self.cache[api_key] = CacheAuthItem(item=item, cached_ts=time.time())
+            self.cache.put(cache_key, item)
             info("fetch -> AUTH -> cache")
             return item
 
         return None
 
     def _auth_error_response(self) -> Response:
-        return error_constructor(
-            message="Invalid authentication",
-            error_type="invalid_request_error",
-            code="invalid_api_key",
-            status_code=401
-        )
+        return self._auth_error
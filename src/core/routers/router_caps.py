@@ -1,9 +1,10 @@
 from typing import List
 
-from fastapi import status
+from fastapi import status, Response
 from pydantic import BaseModel
 
 
+from core.cache import TTLCache
 from core.logger import error
 from core.routers.router_auth import AuthRouter
 from core.routers.schemas import RESPONSES, error_constructor, ErrorResponse, AUTH_HEADER
@@ -14,6 +15,13 @@ from mcpl.wrappers import get_mcpl_tools
 from openai_wrappers.types import ChatTool
 
 
+# built-in tools are fixed at import time
+STATIC_TOOLS = tuple(get_tools_list())
+
+# seconds a serialized tools list is reused for the same set of MCPL servers
+TOOLS_CACHE_TTL = 30
+
+
 class ToolsResponse(BaseModel):
     tools: List[ChatTool]
 
@@ -26,6 +34,8 @@ class CapsRouter(AuthRouter):
     ):
         super().__init__(*args, **kwargs)
         self._mcpl_servers_repository = mcpl_servers_repository
+        # tools depend only on which servers are queried: keyed by their addresses
+        self._tools_cache: TTLCache[tuple, bytes] = TTLCache(ttl=TOOLS_CACHE_TTL)
 
         self.add_api_route(
             "/v1/tools",
@@ -81,16 +91,27 @@ class CapsRouter(AuthRouter):
                 return self._auth_error_response()
 
             servers = await get_active_servers(self._mcpl_servers_repository, auth.user_id)
+
+            cache_key = tuple(s.address for s in servers)
+            if content := self._tools_cache.get(cache_key):
+                return Response(content=content, media_type="application/json")
+
             mcpl_tools = await get_mcpl_tools(self.http_session, servers)
 
-            return ToolsResponse(
+            # both sources already hold validated ChatTool objects;
+            # serialized here in one pass, FastAPI passes a Response through as is
+            tools_response = ToolsResponse.model_construct(
                 tools=[
-                    *get_tools_list(),
+                    *STATIC_TOOLS,
                     *mcpl_tools,
                 ]
             )
+            content = tools_response.model_dump_json().encode()
+            self._tools_cache.set(cache_key, content)
+
+            return Response(content=content, media_type="application/json")
         except Exception as e:
-            error(f"Error retrieving tools: {str(e)}")
+            error("Error retrieving tools: %s", e)
             return error_constructor(
                 message=f"An error occurred while retrieving tools: {e}",
                 error_type="caps_error",
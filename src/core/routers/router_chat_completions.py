@@ -1,13 +1,17 @@
-import json
+import ujson as json
 import time
+import asyncio
 
 import aiohttp
 
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
 from core.logger import info
-from openai_wrappers.types import ChatPost, ChatMessageSystem
+from openai_wrappers.types import ChatPost, ChatMessageSystem, CHAT_MESSAGES_ADAPTER
 
+from core.cache import TTLCache
+from core.chat import has_unanswered_tool_calls
 from core.globals import LLM_PROXY_ADDRESS
 from core.routers.router_auth import AuthRouter
 from core.routers.schemas import AUTH_HEADER
@@ -19,12 +23,48 @@ from mcpl.wrappers import get_mcpl_tool_props, mcpl_tools_execute
 from openai_wrappers.utils import convert_messages_for_openai_format
 
 
+SSE_PREFIX, SSE_POSTFIX = b"data: ", b"\n\n"
+
+# System messages depend only on the MCPL servers' tool props: keyed by server addresses
+SYSTEM_MESSAGE_CACHE_TTL = 60
+_system_messages: TTLCache[tuple, ChatMessageSystem] = TTLCache(ttl=SYSTEM_MESSAGE_CACHE_TTL)
+_system_messages_inflight: dict[tuple, asyncio.Task] = {}
+
+
+# streamed completions may run for longer than the session's total bound:
+# only connecting and each gap between chunks are bounded
+STREAM_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=300)
+
+
+# fields of the tool_res_messages SSE preamble that never change
+PREAMBLE_STATIC = {"id": "XXX", "object": "tool_res_messages", "choices": []}
+
+
 async def compose_system_message(
         http_session: aiohttp.ClientSession,
         servers
+):
+    key = tuple(s.address for s in servers)
+    if message := _system_messages.get(key):
+        return message
+
+    # concurrent misses for the same servers share one fetch
+    if (task := _system_messages_inflight.get(key)) is None:
+        task = asyncio.create_task(_compose_system_message(http_session, servers))
+        _system_messages_inflight[key] = task
+        task.add_done_callback(lambda _: _system_messages_inflight.pop(key, None))
+
+    # shielded: a cancelled request must not cancel the fetch other requests await
+    message = await asyncio.shield(task)
+    _system_messages.set(key, message)
+    return message
+
+
+async def _compose_system_message(
+        http_session: aiohttp.ClientSession,
+        servers
 ):
     system = "You are a helpful AI assistant."
-    # todo: use cache
     mcp_props = await get_mcpl_tool_props(http_session, servers)
 
     if mcp_props:
@@ -39,54 +79,66 @@ async def compose_system_message(
     )
 
 
-async def proxy_stream_response(http_session, post, authorization, tool_res_messages):
-    prefix, postfix = "data: ", "\n\n"
-    if len(tool_res_messages):
-        yield prefix + json.dumps({
-            "id": "XXX",
-            "object": "tool_res_messages",
-            "created": time.time(),
-            "model": post.model,
-            "choices": [],
-            "tool_res_messages": [
-                m.model_dump()
-                for m in tool_res_messages
-            ],
-        }) + postfix
-        info(tool_res_messages)
+def tool_res_messages_preamble(post, tool_res_messages) -> bytes:
+    return SSE_PREFIX + json.dumps({
+        **PREAMBLE_STATIC,
+        # unix seconds, as in OpenAI's own chunks
+        "created": int(time.time()),
+        "model": post.model,
+        # the whole list dumped in one pydantic-core call
+        "tool_res_messages": CHAT_MESSAGES_ADAPTER.dump_python(tool_res_messages),
+    }).encode() + SSE_POSTFIX
+
+
+async def proxy_stream_response(http_session, body, headers, preamble: bytes | None) -> StreamingResponse:
+    # opened before the response starts: a failed connect fails the request
+    # instead of breaking an already started stream
+    response = await http_session.post(
+        f"{LLM_PROXY_ADDRESS}/chat/completions",
+        data=body,
+        headers=headers,
+        timeout=STREAM_TIMEOUT,
+    )
 
-    async with http_session.post(
-            f"{LLM_PROXY_ADDRESS}/chat/completions",
-            json=post.model_dump(),
-            headers={"Authorization": authorization or ""}
-    ) as response:
-        async for chunk in response.content:
-            if chunk:
-                yield chunk
+    return StreamingResponse(
+        relay_stream(response, preamble),
+        media_type="text/event-stream",
+        # release() is idempotent: also covers a stream that never started
+        background=BackgroundTask(response.release),
+    )
 
 
-async def proxy_non_stream_response(http_session, post, authorization, tool_res_messages):
-    # Make a non-streaming request to the proxy
-    post_data = post.model_dump()
-    post_data["stream"] = False  # Ensure stream is set to False
+async def relay_stream(response: aiohttp.ClientResponse, preamble: bytes | None):
+    try:
+        if preamble:
+            yield preamble
 
+        # relay bytes as they arrive; SSE framing already comes from upstream
+        async for chunk in response.content.iter_any():
+            yield chunk
+    finally:
+        response.release()
+
+
+async def proxy_non_stream_response(http_session, body, headers, tool_res_messages):
+    # Make a non-streaming request to the proxy
     async with http_session.post(
             f"{LLM_PROXY_ADDRESS}/chat/completions",
-            json=post_data,
-            headers={"Authorization": authorization or ""}
+            data=body,
+            headers=headers
     ) as response:
-        # Get the complete response as text
-        response_text = await response.text()
+        # Nothing to add: relay the upstream body as is, without decoding it
+        if not tool_res_messages:
+            async for chunk in response.content.iter_any():
+                yield chunk
+            return
 
-        # Parse the response
+        # Parse the response straight from bytes (no intermediate str)
+        response_content = await response.read()
         try:
-            response_data = json.loads(response_text)
+            response_data = json.loads(response_content)
 
-            # Add tool_res_messages if any
-            if len(tool_res_messages):
-                response_data["tool_res_messages"] = [
-                    m.model_dump() for m in tool_res_messages
-                ]
+            response_data["tool_res_messages"] = CHAT_MESSAGES_ADAPTER.dump_python(tool_res_messages)
 
             yield json.dumps(response_data)
         except json.JSONDecodeError:
@@ -119,32 +171,42 @@ class ChatCompletionsRouter(AuthRouter):
 
         if messages and messages[0].role not in ["system", "developer"]:
             system_message = await compose_system_message(self.http_session, servers)
-            messages = [system_message, *messages]
+            messages = [system_message] + messages
 
-        tool_res_messages = await execute_tools_if_needed(tool_context, messages)
+        tool_res_messages = []
+        # most turns carry no tool calls: skip both executors (and the MCPL round trips)
+        if has_unanswered_tool_calls(messages):
+            # local and MCPL tools are independent: run them concurrently
+            tool_res_messages, tool_res_messages_mcpl = await asyncio.gather(
+                execute_tools_if_needed(tool_context, messages),
+                mcpl_tools_execute(self.http_session, servers, auth.user_id, messages),
+            )
 
-        tool_res_messages_mcpl = await mcpl_tools_execute(
-            self.http_session, servers, auth.user_id, messages
-        )
-
-        tool_res_messages.extend(tool_res_messages_mcpl)
-        del tool_res_messages_mcpl
-        info(tool_res_messages)
+            tool_res_messages.extend(tool_res_messages_mcpl)
+            del tool_res_messages_mcpl
+            info(tool_res_messages)
 
-        messages = [
-            *messages,
-            *tool_res_messages
-        ]
+        messages = messages + tool_res_messages
 
         post.messages = convert_messages_for_openai_format(messages)
 
-        # Choose the appropriate response generator based on stream parameter
-        response_generator = proxy_stream_response(
-            self.http_session, post, authorization, tool_res_messages
-        ) if post.stream else proxy_non_stream_response(
-            self.http_session, post, authorization, tool_res_messages
+        # Ensure stream is set to False (not None) for non-streaming requests
+        if not post.stream:
+            post.stream = False
+
+        # upstream request, built once for whichever path runs:
+        # the body is serialized by pydantic in one pass, after all message changes
+        body = post.model_dump_json().encode()
+        headers = {"Authorization": authorization or "", "Content-Type": "application/json"}
+
+        if post.stream:
+            # built before the upstream request, so it's ready as soon as the stream starts
+            preamble = tool_res_messages_preamble(post, tool_res_messages) if tool_res_messages else None
+            return await proxy_stream_response(
+                self.http_session, body, headers, preamble
+            )
+
+        return StreamingResponse(
+            proxy_non_stream_response(self.http_session, body, headers, tool_res_messages),
+            media_type="application/json"
         )
-
-        # Return the appropriate response type
-        media_type = "text/event-stream" if post.stream else "application/json"
-        return StreamingResponse(response_generator, media_type=media_type)
@@ -1,26 +1,96 @@
 import os
 import uuid
-import hashlib
+import asyncio
 
 from urllib.parse import unquote
 from datetime import datetime
 from pathlib import Path
 
-import aiofiles
-
 from xattr import xattr
-from fastapi import Request, status
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from fastapi import Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import Optional, List, AsyncIterator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
+from core.cache import TTLCache
 from core.globals import UPLOADS_DIR
-from core.logger import exception, error, info
+from core.logger import exception, error
 from core.repositories.files_repository import FilesRepository, FileItem
 from core.routers.router_auth import AuthRouter
-from core.routers.schemas import RESPONSES, error_constructor, ErrorResponse, AUTH_HEADER
+from core.routers.schemas import RESPONSES, error_constructor, error_content, error_response, ErrorResponse, AUTH_HEADER
+
+
+# short enough that other workers' writes show up quickly
+FILES_CACHE_TTL = 5
+FILES_CACHE_MAX_ITEMS = 4096
+
+# bodies of the fixed-text errors, serialized once
+ERROR_MISSING_FILE_NAME = error_content(
+    "X-File-Name header is either missing or empty", "files_error", "invalid_request"
+)
+ERROR_DELETE_NOT_FOUND = error_content(
+    "File not found or you don't have permission to delete it", "files_error", "file_not_found"
+)
+ERROR_DELETE_FAILED = error_content(
+    "Failed to delete file from database", "files_error", "file_deletion_failed"
+)
+ERROR_UPDATE_NOT_FOUND = error_content(
+    "File not found or you don't have permission to update it", "files_error", "file_not_found"
+)
+ERROR_UPDATE_FAILED = error_content(
+    "Failed to update file information", "files_error", "file_update_failed"
+)
+
+FILES_LIST_PREFIX = b'{"files":['
+FILES_LIST_POSTFIX = b']}'
+# files read and serialized per streamed chunk
+FILES_LIST_BATCH = 256
+
+# body chunks are coalesced up to this size before a write is handed to the executor
+UPLOAD_CHUNK_BYTES = 1 << 20
+
+
+def write_all(fd: int, data: bytearray) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def set_upload_metadata(fd: int, user_id: int, file_name_orig: str) -> None:
+    try:
+        # Store user ID as metadata
+        attrs = xattr(fd)
+        attrs["user.user_id"] = str(user_id).encode('utf-8')
+        attrs["user.file_name_orig"] = file_name_orig.encode('utf-8')
+
+        # # Store file role
+        # attrs["user.file_role"] = file_role.encode('utf-8')
+    except Exception as e:
+        error("Failed to set file metadata: %s", e)
+
+
+def unlink_missing_ok(path: Path) -> None:
+    path.unlink(missing_ok=True)
+
+
+async def drain_to_fd(request: Request, fd: int) -> int:
+    loop = asyncio.get_running_loop()
+    buffer = bytearray()
+    size = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        size += len(chunk)
+        if len(buffer) >= UPLOAD_CHUNK_BYTES:
+            await loop.run_in_executor(None, write_all, fd, buffer)
+            buffer = bytearray()
+    if buffer:
+        await loop.run_in_executor(None, write_all, fd, buffer)
+    return size
 
 
 class FileItemResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     file_name: str = Field(..., description="Unique file identifier")
     file_name_orig: str = Field(..., description="Original file name")
     file_ext: str = Field(..., description="File extension")
@@ -31,26 +101,44 @@ class FileItemResponse(BaseModel):
     created_at: datetime = Field(..., description="Timestamp when the file was created")
 
 
+def to_file_response(file: FileItem) -> FileItemResponse:
+    # FileItem is already validated; model_construct ignores fields the response lacks (user_id)
+    return FileItemResponse.model_construct(**file.__dict__)
+
+
 class FilesListResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     files: List[FileItemResponse] = Field(..., description="List of user's files")
 
 
+FILE_RESPONSES_ADAPTER = TypeAdapter(List[FileItemResponse])
+
+
 class FileUploadResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     status: str = Field(..., description="Status of the upload operation")
     file_name: str = Field(..., description="Original file name")
     stored_as: str = Field(..., description="Stored file name (hashed)")
 
 
 class FileDeleteRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     file_name: str = Field(..., description="The name of the file to delete")
 
 
 class FileDeleteResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     status: str = Field(..., description="Status of the delete operation")
     message: str = Field(..., description="Message describing the result")
 
 
 class FileUpdateRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     file_name: str = Field(..., description="The name of the file to update")
     file_name_orig: Optional[str] = Field(None, description="New original file name")
     file_role: Optional[str] = Field(None, description="New file role")
@@ -59,6 +147,8 @@ class FileUpdateRequest(BaseModel):
 
 
 class FileUpdateResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     status: str = Field(..., description="Status of the update operation")
     message: str = Field(..., description="Message describing the result")
     file: FileItemResponse = Field(..., description="Updated file information")
@@ -72,6 +162,14 @@ class FilesRouter(AuthRouter):
     ):
         super().__init__(*args, **kwargs)
         self._files_repository = files_repository
+        # created once here, so uploads don't probe for it
+        self._uploads_dir = Path(UPLOADS_DIR)
+        self._uploads_dir.mkdir(parents=True, exist_ok=True)
+        # user_id -> FilesListResponse JSON. Only for listing: delete and update check ownership
+        # against the database, since another worker may have removed the file meanwhile
+        self._files_cache: TTLCache[int, bytes] = TTLCache(FILES_CACHE_TTL, FILES_CACHE_MAX_ITEMS)
+        # bumped on every invalidation: reads that started before it don't cache their result
+        self._files_generation = 0
 
         self.add_api_route(
             "/v1/files/list",
@@ -238,6 +336,50 @@ class FilesRouter(AuthRouter):
             }
         )
 
+    async def _stream_user_files(
+            self,
+            user_id: int,
+            first_batch: List[FileItemResponse],
+            files: AsyncIterator[FileItem],
+            generation: int
+    ) -> AsyncIterator[bytes]:
+        # the body is teed into the cache, so the next list is served without the database or pydantic
+        parts = [FILES_LIST_PREFIX, self._files_list_chunk(first_batch, first=True)]
+        yield b"".join(parts)
+
+        batch = []
+        async for f in files:
+            batch.append(to_file_response(f))
+            if len(batch) < FILES_LIST_BATCH:
+                continue
+            chunk = self._files_list_chunk(batch, first=False)
+            batch = []
+            parts.append(chunk)
+            yield chunk
+        if batch:
+            chunk = self._files_list_chunk(batch, first=False)
+            parts.append(chunk)
+            yield chunk
+
+        parts.append(FILES_LIST_POSTFIX)
+        yield FILES_LIST_POSTFIX
+
+        self._cache_files_list(user_id, generation, b"".join(parts))
+
+    def _cache_files_list(self, user_id: int, generation: int, content: bytes):
+        if generation == self._files_generation:
+            self._files_cache.set(user_id, content)
+
+    @staticmethod
+    def _files_list_chunk(batch: List[FileItemResponse], first: bool) -> bytes:
+        # one serializer pass per batch; [1:-1] drops the batch's own brackets
+        chunk = FILE_RESPONSES_ADAPTER.dump_json(batch)[1:-1]
+        return chunk if first else b"," + chunk
+
+    def _invalidate_files(self, user_id: int):
+        self._files_generation += 1
+        self._files_cache.pop(user_id)
+
     async def _files_list(self, authorization = AUTH_HEADER):
         """
         Get the list of files for the authenticated user.
@@ -260,13 +402,33 @@ class FilesRouter(AuthRouter):
             if not auth:
                 return self._auth_error_response()
 
-            files = await self._files_repository.get_user_files(auth.user_id)
-
-            return FilesListResponse(
-                files=[FileItemResponse(**f.model_dump(mode='json')) for f in files]
+            content = self._files_cache.get(auth.user_id)
+            if content is not None:
+                return Response(content=content, media_type="application/json")
+
+            generation = self._files_generation
+            files = self._files_repository.iter_user_files(auth.user_id, FILES_LIST_BATCH)
+
+            # the first page is read here, so a database error still gets the error response below
+            first_batch = []
+            async for f in files:
+                first_batch.append(to_file_response(f))
+                if len(first_batch) == FILES_LIST_BATCH:
+                    break
+
+            if len(first_batch) < FILES_LIST_BATCH:
+                # that was the whole list: answer it in one piece
+                content = FILES_LIST_PREFIX + self._files_list_chunk(first_batch, first=True) + FILES_LIST_POSTFIX
+                self._cache_files_list(auth.user_id, generation, content)
+                return Response(content=content, media_type="application/json")
+
+            # further pages are read while the response is being sent
+            return StreamingResponse(
+                self._stream_user_files(auth.user_id, first_batch, files, generation),
+                media_type="application/json",
             )
         except Exception as e:
-            error(f"Error retrieving files: {str(e)}")
+            error("Error retrieving files: %s", e)
             return error_constructor(
                 message=f"An error occurred while retrieving files: {e}",
                 error_type="files_error",
@@ -302,61 +464,46 @@ class FilesRouter(AuthRouter):
         file_role = request.headers.get('X-File-Role', 'document')
 
         if not file_name:
-            return error_constructor(
-                message="X-File-Name header is either missing or empty",
-                error_type="files_error",
-                code="invalid_request",
-                status_code=400,
-            )
+            return error_response(ERROR_MISSING_FILE_NAME, 400)
 
         file_name = unquote(file_name)
 
-        # Create a unique hash based on the original filename and a random UUID
-        random_hash = hashlib.sha256(f"{file_name}{uuid.uuid4()}".encode()).hexdigest()  # type: ignore
+        # A random UUID is already unique (122 random bits): hashing it adds nothing
+        random_hash = uuid.uuid4().hex
 
         # Keep the original file extension if it exists
         original_extension = Path(file_name).suffix
         hashed_filename = f"{random_hash}{original_extension}"
 
-        file_path = Path(UPLOADS_DIR) / hashed_filename
-        temp_file_path = file_path.with_suffix(file_path.suffix + '.tmp')
-
-        if temp_file_path.exists():
-            os.remove(temp_file_path)
-
-        temp_file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path = self._uploads_dir / hashed_filename
 
+        fd = None
         try:
-            async with aiofiles.open(temp_file_path, 'wb') as f:
-                async for chunk in request.stream():
-                    info(f"writing chunk type: {type(chunk)}, length: {len(chunk)}")
-                    await f.write(chunk)
-
-            os.rename(temp_file_path, file_path)
-
+            # the name is a fresh random UUID, so it is written in place;
+            # O_EXCL guarantees an existing file is never clobbered
+            fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
             try:
-                # Store user ID as metadata
-                attrs = xattr(str(file_path))
-                attrs["user.user_id"] = str(auth.user_id).encode('utf-8')
-                attrs["user.file_name_orig"] = file_name.encode('utf-8')
-
-                # # Store file role
-                # attrs["user.file_role"] = file_role.encode('utf-8')
-            except Exception as e:
-                error(f"Failed to set file metadata: {str(e)}")
+                file_size = await drain_to_fd(request, fd)
+                # setxattr can block (e.g. on network filesystems): keep it off the event loop
+                await asyncio.get_running_loop().run_in_executor(
+                    None, set_upload_metadata, fd, auth.user_id, file_name
+                )
+            finally:
+                os.close(fd)
 
             file_item = FileItem(
                 file_name=hashed_filename,
                 file_name_orig=file_name,
                 file_ext=original_extension,
                 file_role=file_role,
-                file_size=os.path.getsize(file_path),
+                file_size=file_size,
                 user_id=auth.user_id,
                 created_at=datetime.now(),
             )
 
             if not await self._files_repository.create_file(file_item):
                 raise Exception("Failed to save file information to database")
+            self._invalidate_files(auth.user_id)
 
             return FileUploadResponse(
                 status="success",
@@ -365,9 +512,10 @@ class FilesRouter(AuthRouter):
             )
 
         except Exception as e:
-            exception(f"Error uploading file: {str(e)}")
-            if temp_file_path.exists():
-                os.remove(temp_file_path)
+            exception("Error uploading file: %s", e)
+            if fd is not None:
+                # only unlink what this request created
+                await asyncio.get_running_loop().run_in_executor(None, unlink_missing_ok, file_path)
 
             return error_constructor(
                 message=f"Failed to upload file: {str(e)}",
@@ -402,31 +550,23 @@ class FilesRouter(AuthRouter):
 
             file_name = request.file_name
 
-            # Get user files to verify ownership
-            user_files = await self._files_repository.get_user_files(auth.user_id)
-            file_exists = any(file.file_name == file_name for file in user_files)
-
-            if not file_exists:
-                return error_constructor(
-                    message="File not found or you don't have permission to delete it",
-                    error_type="files_error",
-                    code="file_not_found",
-                    status_code=404,
-                )
+            # Verify ownership
+            if not await self._files_repository.get_file(auth.user_id, file_name):
+                return error_response(ERROR_DELETE_NOT_FOUND, 404)
 
-            # Delete from database
+            # The row goes first: while it exists the file is listed and can be updated,
+            # so its data must stay until the delete has succeeded
             if not await self._files_repository.delete_file(file_name):
-                return error_constructor(
-                    message="Failed to delete file from database",
-                    error_type="files_error",
-                    code="file_deletion_failed",
-                    status_code=500,
-                )
+                return error_response(ERROR_DELETE_FAILED, 500)
+            self._invalidate_files(auth.user_id)
 
-            # Delete the actual file
-            file_path = Path(UPLOADS_DIR) / file_name
-            if file_path.exists():
-                os.remove(file_path)
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, unlink_missing_ok, self._uploads_dir / file_name
+                )
+            except OSError as e:
+                # the row is gone, so the delete did succeed: only the stored data is left behind
+                error("Orphaned upload %s: %s", file_name, e)
 
             return FileDeleteResponse(
                 status="success",
@@ -434,7 +574,7 @@ class FilesRouter(AuthRouter):
             )
 
         except Exception as e:
-            exception(f"Error deleting file: {str(e)}")
+            exception("Error deleting file: %s", e)
             return error_constructor(
                 message=f"Failed to delete file: {str(e)}",
                 error_type="files_error",
@@ -468,48 +608,39 @@ class FilesRouter(AuthRouter):
 
             file_name = request.file_name
 
-            # Get user files to verify ownership and get current file data
-            user_files = await self._files_repository.get_user_files(auth.user_id)
-            file_to_update = next((file for file in user_files if file.file_name == file_name), None)
+            # Verify ownership and get current file data
+            file_to_update = await self._files_repository.get_file(auth.user_id, file_name)
 
             if not file_to_update:
-                return error_constructor(
-                    message="File not found or you don't have permission to update it",
-                    error_type="files_error",
-                    code="file_not_found",
-                    status_code=404,
-                )
-
-            # Update only the fields provided in the request
-            if request.file_name_orig is not None:
-                file_to_update.file_name_orig = request.file_name_orig
+                return error_response(ERROR_UPDATE_NOT_FOUND, 404)
 
-            if request.file_role is not None:
-                file_to_update.file_role = request.file_role
+            # Only the fields provided in the request are updated
+            changes = request.model_dump(exclude={"file_name"}, exclude_none=True)
 
-            if request.file_type is not None:
-                file_to_update.file_type = request.file_type
+            # Nothing to change: answer with the current data, without a write
+            if not changes:
+                return FileUpdateResponse(
+                    status="success",
+                    message="File updated successfully",
+                    file=to_file_response(file_to_update)
+                )
 
-            if request.processing_status is not None:
-                file_to_update.processing_status = request.processing_status
+            # FileItem is frozen: the update is a new item
+            file_to_update = file_to_update.model_copy(update=changes)
 
             # Update the file in the database
             if not await self._files_repository.update_file(file_name, file_to_update):
-                return error_constructor(
-                    message="Failed to update file information",
-                    error_type="files_error",
-                    code="file_update_failed",
-                    status_code=500,
-                )
+                return error_response(ERROR_UPDATE_FAILED, 500)
+            self._invalidate_files(auth.user_id)
 
             return FileUpdateResponse(
                 status="success",
                 message="File updated successfully",
-                file=FileItemResponse(**file_to_update.model_dump(mode='json'))
+                file=to_file_response(file_to_update)
             )
 
         except Exception as e:
-            exception(f"Error updating file: {str(e)}")
+            exception("Error updating file: %s", e)
             return error_constructor(
                 message=f"Failed to update file: {str(e)}",
                 error_type="files_error",
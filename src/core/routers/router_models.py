@@ -1,27 +1,89 @@
+from typing import Callable, Optional, Tuple
+
+import aiohttp
+
 from fastapi import Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
+from core.cache import TTLCache
 from core.globals import LLM_PROXY_ADDRESS
-from core.routers.router_auth import AuthRouter
+from core.routers.router_auth import AuthRouter, auth_cache_key
 from core.routers.schemas import AUTH_HEADER
 
 
+# the model catalog rarely changes: serve repeated lookups from memory for a while
+MODELS_CACHE_TTL = 30
+MODELS_CACHE_MAX_ITEMS = 1024
+
+
+async def relay_body(response: aiohttp.ClientResponse, store: Optional[Callable[[bytes], None]] = None):
+    try:
+        parts = []
+        async for chunk in response.content.iter_any():
+            if store:
+                parts.append(chunk)
+            yield chunk
+        if store:
+            store(b"".join(parts))
+    finally:
+        response.release()
+
+
+async def proxy_get(
+        http_session: aiohttp.ClientSession,
+        url: str,
+        authorization,
+        store: Optional[Callable[[bytes, str], None]] = None
+) -> StreamingResponse:
+    # status and headers are known before the body: relay it as it arrives instead of buffering it
+    response = await http_session.get(url, headers={"Authorization": authorization})
+    media_type = response.headers.get("content-type")
+
+    body_store = None
+    if store and response.status == 200:
+        def body_store(content: bytes):
+            store(content, media_type)
+
+    return StreamingResponse(
+        relay_body(response, body_store),
+        status_code=response.status,
+        media_type=media_type,
+        # release() is idempotent: also covers a body that was never read
+        background=BackgroundTask(response.release),
+    )
+
+
 class ModelsRouter(AuthRouter):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # (url, hashed authorization) -> (body, content type); only 200 responses are kept
+        self._models_cache: TTLCache[Tuple[str, str], Tuple[bytes, str]] = TTLCache(
+            MODELS_CACHE_TTL, MODELS_CACHE_MAX_ITEMS
+        )
 
         self.add_api_route("/v1/models", self._models, methods=["GET"])
         self.add_api_route("/v1/models/{model}", self._model_info, methods=["GET"])
 
+    async def _cached_get(self, url: str, authorization):
+        # upstream decides what a key may see: entries are per key,
+        # so a cached body is only ever served to the key it was fetched with
+        if not authorization:
+            return await proxy_get(self.http_session, url, authorization)
+
+        key = (url, auth_cache_key(authorization))
+        cached = self._models_cache.get(key)
+        if cached is not None:
+            content, media_type = cached
+            return Response(content=content, media_type=media_type)
+
+        def store(content: bytes, media_type: str):
+            self._models_cache.set(key, (content, media_type))
+
+        return await proxy_get(self.http_session, url, authorization, store)
+
     async def _models(self, authorization = AUTH_HEADER):
-        async with self.http_session.get(f"{LLM_PROXY_ADDRESS}/models",
-                               headers={"Authorization": authorization}) as response:
-            content = await response.read()
-            return Response(content=content, status_code=response.status,
-                            media_type=response.headers.get("content-type"))
+        return await self._cached_get(f"{LLM_PROXY_ADDRESS}/models", authorization)
 
     async def _model_info(self, model: str, authorization = AUTH_HEADER):
-        async with self.http_session.get(f"{LLM_PROXY_ADDRESS}/models/{model}",
-                               headers={"Authorization": authorization}) as response:
-            content = await response.read()
-            return Response(content=content, status_code=response.status,
-                            media_type=response.headers.get("content-type"))
+        return await self._cached_get(f"{LLM_PROXY_ADDRESS}/models/{model}", authorization)
@@ -1,4 +1,4 @@
-import json
+from typing import Dict, Tuple
 
 from pydantic import BaseModel
 from fastapi import Header, Response
@@ -59,23 +59,47 @@ RESPONSES = {
 }
 
 
-def error_constructor(message: str, error_type: str, code: str, status_code: int) -> Response:
+def error_content(message: str, error_type: str, code: str) -> bytes:
     """
-    Example:
-        message="Invalid authentication",
-        type="invalid_request_error",
-        code="invalid_api_key"
-        status_code=401
+    Serialized ErrorResponse body.
+    Errors with a fixed message are built once and kept as module constants.
     """
-    error_response = ErrorResponse(
+    return ErrorResponse(
         error=ErrorDetail(
             message=message,
             type=error_type,
             code=code
         )
-    )
+    ).model_dump_json().encode()
+
+
+def error_response(content: bytes, status_code: int) -> Response:
     return Response(
         status_code=status_code,
-        content=json.dumps(error_response.model_dump()),
+        content=content,
         media_type="application/json"
     )
+
+
+# bodies of the well-known errors above, serialized once from their examples
+CANNED_ERRORS: Dict[Tuple[int, str], bytes] = {
+    (status_code, example["error"]["code"]): ErrorResponse.model_validate(example).model_dump_json().encode()
+    for responses in RESPONSES.values()
+    for status_code, spec in responses.items()
+    for example in [spec["content"]["application/json"]["example"]]
+}
+
+
+def canned_error_response(status_code: int, code: str) -> Response:
+    return error_response(CANNED_ERRORS[(status_code, code)], status_code)
+
+
+def error_constructor(message: str, error_type: str, code: str, status_code: int) -> Response:
+    """
+    Example:
+        message="Invalid authentication",
+        type="invalid_request_error",
+        code="invalid_api_key"
+        status_code=401
+    """
+    return error_response(error_content(message, error_type, code), status_code)
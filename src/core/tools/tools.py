@@ -1,12 +1,12 @@
-import json
-from typing import List
+import ujson as json
+from typing import Dict, List, Tuple
 
 from chat_tools.tool_usage import Tool
 from openai_wrappers.types import (
-    ChatMessage, ChatTool, ChatMessageUser, ChatMessageTool
+    ChatMessage, ChatTool, ChatMessageTool
 )
 
-from core.chat import get_unanswered_tool_calls
+from core.chat import get_messages_since_last_user_message, get_unanswered_tool_calls
 from core.tools.tool_context import ToolContext
 from core.tools.tool_ping_pong import ToolPingPong
 from core.tools.tool_utils import build_tool_call
@@ -16,6 +16,11 @@ TOOLS: List[Tool] = [
 ]
 assert len({t.name for t in TOOLS}) == len(TOOLS), "TOOLS: names must be unique"
 
+TOOLS_BY_NAME: Dict[str, Tool] = {t.name: t for t in TOOLS}
+
+# tool descriptors never change: build them once, at import
+CHAT_TOOLS: Tuple[ChatTool, ...] = tuple(t.as_chat_tool() for t in TOOLS)
+
 
 async def execute_tools_if_needed(tool_context: ToolContext, messages: List[ChatMessage]) -> List[ChatMessageTool]:
     """Execute pending tool calls from the chat message history.
@@ -39,20 +44,14 @@ async def execute_tools_if_needed(tool_context: ToolContext, messages: List[Chat
     """
 
     # Collect messages since last user message
-    messages_since_last_user_msg = []
-    for message in reversed(messages):
-        if isinstance(message, ChatMessageUser):
-            break
-        messages_since_last_user_msg.insert(0, message)
+    messages_since_last_user_msg = get_messages_since_last_user_message(messages)
 
     tool_res_messages = []
     for tool_call in get_unanswered_tool_calls(messages_since_last_user_msg):
-        tool = [t for t in TOOLS if t.name == tool_call.function.name]
-        if not tool:
+        tool = TOOLS_BY_NAME.get(tool_call.function.name)
+        if tool is None:
             continue
 
-        tool = tool[0]
-
         # assuming, there's always JSON in arguments
         try:
             args = json.loads(tool_call.function.arguments)
@@ -79,8 +78,8 @@ def get_tools_list() -> List[ChatTool]:
     """
     Get a list of all available tools in their ChatTool configuration format.
 
-    This function converts all registered tools (from the TOOLS list) into their
-    ChatTool representations by calling as_chat_tool() on each tool instance.
+    The ChatTool representations of all registered tools (from the TOOLS list)
+    are built once at import by calling as_chat_tool() on each tool instance.
     The ChatTool format includes each tool's interface definition, such as its
     function name, description, and parameter specifications.
 
@@ -90,4 +89,4 @@ def get_tools_list() -> List[ChatTool]:
             details, and parameter specifications needed by the chat system to
             interact with the tool.
     """
-    return [t.as_chat_tool() for t in TOOLS]
+    return list(CHAT_TOOLS)
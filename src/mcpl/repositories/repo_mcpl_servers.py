@@ -1,13 +1,22 @@
 import sqlite3
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from core.repositories.abstract_repository import AbstractRepository
 
 
+SQL_INSERT_SERVER = """
+INSERT INTO mcpl_servers
+(user_id, address, is_active)
+VALUES (?, ?, ?)
+"""
+
+
 class MCPLServer(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: int = None
     user_id: int
     address: str
@@ -15,6 +24,15 @@ class MCPLServer(BaseModel):
 
 
 class MCPLServersRepository(AbstractRepository):
+    # small table: no cache or mmap sizing, just WAL and cheaper commits
+    PRAGMAS = (
+        "journal_mode=WAL",
+        "synchronous=NORMAL",
+        "temp_store=MEMORY",
+        "busy_timeout=5000",
+    )
+    POOL_SIZE = 4
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._init_db()
@@ -30,17 +48,19 @@ class MCPLServersRepository(AbstractRepository):
                 is_active BOOLEAN NOT NULL
             )
             """)
+            # every read and the replace-all delete filter on user_id
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_mcpl_servers_user ON mcpl_servers(user_id)")
+            # chat completions only need active servers: skip inactive rows without reading them
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_mcpl_servers_user_active ON mcpl_servers(user_id) WHERE is_active = 1"
+            )
             conn.commit()
 
     def create_server_sync(self, server: MCPLServer) -> int:
         with self._get_db_connection() as conn:
             try:
                 cursor = conn.execute(
-                    """
-                    INSERT INTO mcpl_servers 
-                    (user_id, address, is_active)
-                    VALUES (?, ?, ?)
-                    """,
+                    SQL_INSERT_SERVER,
                     (
                         server.user_id,
                         server.address,
@@ -85,6 +105,11 @@ class MCPLServersRepository(AbstractRepository):
             except sqlite3.Error:
                 return False
 
+    @staticmethod
+    def _row_to_server(_cursor: sqlite3.Cursor, row: tuple) -> MCPLServer:
+        # rows come from our own schema: skip pydantic validation
+        return MCPLServer.model_construct(id=row[0], user_id=row[1], address=row[2], is_active=bool(row[3]))
+
     def get_user_servers_sync(self, user_id: int) -> List[MCPLServer]:
         with self._get_db_connection() as conn:
             cursor = conn.execute(
@@ -96,42 +121,84 @@ class MCPLServersRepository(AbstractRepository):
                 (user_id,)
             )
 
-            servers = []
-            for row in cursor.fetchall():
-                servers.append(MCPLServer(
-                    id=row[0],
-                    user_id=row[1],
-                    address=row[2],
-                    is_active=row[3]
-                ))
+            # set on the cursor, not the pooled connection; fetchall() then drives the row loop itself
+            cursor.row_factory = self._row_to_server
+            return cursor.fetchall()
 
-            return servers
+    def get_active_user_servers_sync(self, user_id: int) -> List[MCPLServer]:
+        with self._get_db_connection() as conn:
+            cursor = conn.execute(
+                """
+                SELECT id, user_id, address, is_active
+                FROM mcpl_servers
+                WHERE user_id = ? AND is_active = 1
+                """,
+                (user_id,)
+            )
+
+            cursor.row_factory = self._row_to_server
+            return cursor.fetchall()
+
+    @staticmethod
+    def _diff_servers(
+            existing: List[Tuple[int, str, bool]],
+            servers: List[MCPLServer]
+    ) -> Optional[Tuple[List[int], List[Tuple[bool, int]], List[MCPLServer]]]:
+        """
+        Edits turning the user's stored rows (in id order) into `servers`.
+
+        Returns:
+            (ids to delete, (is_active, id) updates, servers to insert), or None if the
+            edits can't keep the listing in `servers` order: kept servers would have to
+            change places, or a new one would land between them
+        """
+        by_address = {}
+        to_delete = []
+        for row_id, address, is_active in existing:
+            if address in by_address:
+                to_delete.append(row_id)
+            else:
+                by_address[address] = (row_id, bool(is_active))
+
+        addresses = {server.address for server in servers}
+        kept = [server for server in servers if server.address in by_address]
+        if servers[:len(kept)] != kept or [s.address for s in kept] != [a for a in by_address if a in addresses]:
+            return None
+
+        to_delete.extend(row_id for address, (row_id, _) in by_address.items() if address not in addresses)
+        to_update = [
+            (server.is_active, by_address[server.address][0])
+            for server in kept
+            if server.is_active != by_address[server.address][1]
+        ]
+        return to_delete, to_update, servers[len(kept):]
 
     def update_user_servers_sync(self, user_id: int, servers: List[MCPLServer]) -> bool:
         with self._get_db_connection() as conn:
             try:
-                # Start a transaction
-                conn.execute("BEGIN TRANSACTION")
+                # IMMEDIATE: the rows are read and then written in the same transaction
+                conn.execute("BEGIN IMMEDIATE")
 
-                # Delete all existing servers for the user
-                conn.execute(
-                    "DELETE FROM mcpl_servers WHERE user_id = ?",
+                existing = conn.execute(
+                    "SELECT id, address, is_active FROM mcpl_servers WHERE user_id = ? ORDER BY id",
                     (user_id,)
-                )
-
-                # Insert the new servers
-                for server in servers:
-                    conn.execute(
-                        """
-                        INSERT INTO mcpl_servers 
-                        (user_id, address, is_active)
-                        VALUES (?, ?, ?)
-                        """,
-                        (
-                            user_id,
-                            server.address,
-                            server.is_active
-                        )
+                ).fetchall()
+
+                # Only rows that change are written; replace them all when the order changes
+                diff = self._diff_servers(existing, servers)
+                if diff is None:
+                    to_delete, to_update, to_insert = [row[0] for row in existing], [], servers
+                else:
+                    to_delete, to_update, to_insert = diff
+
+                if to_delete:
+                    conn.executemany("DELETE FROM mcpl_servers WHERE id = ?", [(row_id,) for row_id in to_delete])
+                if to_update:
+                    conn.executemany("UPDATE mcpl_servers SET is_active = ? WHERE id = ?", to_update)
+                if to_insert:
+                    conn.executemany(
+                        SQL_INSERT_SERVER,
+                        [(user_id, server.address, server.is_active) for server in to_insert]
                     )
 
                 # Commit the transaction
@@ -154,6 +221,9 @@ class MCPLServersRepository(AbstractRepository):
     async def get_user_servers(self, user_id: int) -> List[MCPLServer]:
         return await self._run_in_thread(self.get_user_servers_sync, user_id)
 
+    async def get_active_user_servers(self, user_id: int) -> List[MCPLServer]:
+        return await self._run_in_thread(self.get_active_user_servers_sync, user_id)
+
     async def update_user_servers(self, user_id: int, servers: List[MCPLServer]) -> bool:
         """
         Replace all servers for a user with the provided list of servers.
@@ -1,21 +1,42 @@
 from collections import Counter
 
-from fastapi import status
+from fastapi import Response, status
 from typing import List
 from pydantic import BaseModel, Field, validator
 
-from core.globals import DEFAULT_MCPL_SERVERS
+from core.cache import TTLCache
 from core.logger import error, exception
 from mcpl.repositories.repo_mcpl_servers import MCPLServersRepository, MCPLServer
+from mcpl.servers import DEFAULT_SERVERS
 from core.routers.router_auth import AuthRouter
 from core.routers.schemas import RESPONSES, error_constructor, ErrorResponse, AUTH_HEADER
 
 
+# short enough that other workers' updates show up quickly
+MCPL_SERVERS_CACHE_TTL = 5
+MCPL_SERVERS_CACHE_MAX_ITEMS = 4096
+
+
+def json_response(model: BaseModel) -> Response:
+    # pydantic's serializer, once: a returned Response skips the response_model pass and the encoder
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
 class MCPLServerItem(BaseModel):
     address: str = Field(..., description="Server address (IP:port or domain:port)")
     is_active: bool = Field(True, description="Whether the server is active")
 
 
+def normalize_v1_address(address: str) -> str:
+    # servers are saved with their /v1 API root: wrappers append /tools etc. to it
+    return address if address.endswith("/v1") else address.rstrip("/") + "/v1"
+
+
+def to_server_item(server: MCPLServer) -> MCPLServerItem:
+    # MCPLServer is already validated: copy the two fields without re-validating them
+    return MCPLServerItem.model_construct(address=server.address, is_active=server.is_active)
+
+
 class MCPLServersListResponse(BaseModel):
     servers: List[MCPLServerItem] = Field(..., description="List of user's MCPL servers")
 
@@ -48,6 +69,12 @@ class MCPLRouter(AuthRouter):
     ):
         super().__init__(*args, **kwargs)
         self._mcpl_servers_repository = mcpl_servers_repository
+        # user_id -> serialized MCPLServersListResponse; dropped on every update of that user
+        self._servers_cache: TTLCache[int, bytes] = TTLCache(
+            MCPL_SERVERS_CACHE_TTL, MCPL_SERVERS_CACHE_MAX_ITEMS
+        )
+        # bumped on every update: lists read before it are not cached
+        self._servers_generation = 0
 
         self.add_api_route(
             "/v1/mcpl-servers-list",
@@ -131,17 +158,22 @@ class MCPLRouter(AuthRouter):
             if not auth:
                 return self._auth_error_response()
 
-            servers = await self._mcpl_servers_repository.get_user_servers(auth.user_id)
-            default_servers = [
-                MCPLServer(user_id=-1, address=s, is_active=True) for s in DEFAULT_MCPL_SERVERS
-            ]
-            servers.extend(default_servers)
+            cached = self._servers_cache.get(auth.user_id)
+            if cached is not None:
+                return Response(content=cached, media_type="application/json")
 
-            return MCPLServersListResponse(
-                servers=[MCPLServerItem(address=s.address, is_active=s.is_active) for s in servers]
-            )
+            generation = self._servers_generation
+            servers = await self._mcpl_servers_repository.get_user_servers(auth.user_id)
+            servers.extend(DEFAULT_SERVERS)
+
+            content = MCPLServersListResponse(
+                servers=[to_server_item(s) for s in servers]
+            ).model_dump_json()
+            if generation == self._servers_generation:
+                self._servers_cache.set(auth.user_id, content)
+            return Response(content=content, media_type="application/json")
         except Exception as e:
-            error(f"Error retrieving MCPL servers: {str(e)}")
+            error("Error retrieving MCPL servers: %s", e)
             return error_constructor(
                 message=f"An error occurred while retrieving servers: {e}",
                 error_type="mcpl_error",
@@ -176,7 +208,7 @@ class MCPLRouter(AuthRouter):
             mcpl_servers = [
                 MCPLServer(
                     user_id=auth.user_id,
-                    address=server.address if server.address.endswith("/v1") else (server.address.rstrip("/") + "/v1"),
+                    address=normalize_v1_address(server.address),
                     is_active=server.is_active
                 ) for server in request.servers
             ]
@@ -192,17 +224,19 @@ class MCPLRouter(AuthRouter):
                     status_code=500,
                 )
 
-            # Get the updated servers to return in the response
-            updated_servers = await self._mcpl_servers_repository.get_user_servers(auth.user_id)
+            # after the commit: lists that read the old rows are dropped, or not cached once they finish
+            self._servers_generation += 1
+            self._servers_cache.pop(auth.user_id)
 
-            return MCPLServersUpdateResponse(
+            # the user's servers are now exactly mcpl_servers, stored in this order: no need to read them back
+            return json_response(MCPLServersUpdateResponse(
                 status="success",
                 message="Servers updated successfully",
-                servers=[MCPLServerItem(address=s.address, is_active=s.is_active) for s in updated_servers]
-            )
+                servers=[to_server_item(s) for s in mcpl_servers]
+            ))
 
         except Exception as e:
-            exception(f"Error updating MCPL servers: {str(e)}")
+            exception("Error updating MCPL servers: %s", e)
             return error_constructor(
                 message=f"Failed to update servers: {str(e)}",
                 error_type="mcpl_error",
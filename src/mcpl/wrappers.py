@@ -1,13 +1,89 @@
 import asyncio
 from itertools import chain
-from typing import Optional, List
+from typing import Any, Optional, List, Awaitable, Callable, Dict, TypeVar
 
 import aiohttp
+import ujson as json
 from pydantic import BaseModel
 
+from core.cache import TTLCache
 from core.logger import error, exception
 from mcpl.repositories.repo_mcpl_servers import MCPLServer
-from openai_wrappers.types import ChatTool, ChatMessage, model_validate_chat_message
+from openai_wrappers.types import ChatTool, ChatMessage, CHAT_MESSAGES_ADAPTER, model_validate_chat_message
+
+
+# Upper bound on concurrent requests a single fan-out sends to MCPL servers
+MCPL_FANOUT_LIMIT = 16
+
+# Listing tools or their props is cheap: a server that can't answer in time is skipped,
+# so one slow server can't hold up the whole fan-out
+MCPL_LIST_TIMEOUT = aiohttp.ClientTimeout(total=5.0, connect=1.0)
+# Tools may legitimately run for long: the session's 5 minutes, but reaching the server fails fast
+MCPL_EXECUTE_TIMEOUT = aiohttp.ClientTimeout(total=300, connect=1.0)
+# Response bodies larger than this are parsed in a thread: it would stall the event loop
+MCPL_THREAD_PARSE_BYTES = 1 << 20
+
+# Tool catalogs change rarely: each server's tools and props are reused for a while.
+# Derived caches are built from these results, so their TTLs add up: a tool change on a server
+# shows up in /v1/tools within 90s (this + TOOLS_CACHE_TTL in router_caps) and in system
+# prompts within 120s (this + SYSTEM_MESSAGE_CACHE_TTL in router_chat_completions)
+MCPL_CATALOG_CACHE_TTL = 60
+MCPL_CATALOG_CACHE_MAX_ITEMS = 4096
+
+T = TypeVar("T")
+
+# url (/tools or /tools-props of one server) -> its last successful result; failures are not cached
+_catalog_cache: TTLCache[str, list] = TTLCache(MCPL_CATALOG_CACHE_TTL, MCPL_CATALOG_CACHE_MAX_ITEMS)
+_catalog_inflight: Dict[str, asyncio.Task] = {}
+
+
+async def gather_bounded(aws: List[Awaitable[T]], limit: int = MCPL_FANOUT_LIMIT) -> List[T]:
+    """
+    Await all awaitables concurrently, at most `limit` at a time, preserving order.
+
+    Keeps users with many registered servers from taking a large share of the
+    shared session's connection pool in one burst.
+    """
+    sem = asyncio.Semaphore(limit)
+
+    async def run(aw: Awaitable[T]) -> T:
+        async with sem:
+            return await aw
+
+    async with asyncio.TaskGroup() as tg:
+        tasks = [tg.create_task(run(aw)) for aw in aws]
+
+    return [t.result() for t in tasks]
+
+
+async def fetch_catalog_cached(url: str, fetch: Callable[[], Awaitable[Optional[List[T]]]]) -> List[T]:
+    """
+    Result of `fetch` for `url`, from the catalog cache while it's fresh.
+
+    `fetch` returns None on failure: that is not cached, [] is returned instead.
+    Concurrent misses for the same url share one fetch.
+    """
+    if (cached := _catalog_cache.get(url)) is not None:
+        return cached
+
+    if (task := _catalog_inflight.get(url)) is None:
+        task = asyncio.create_task(fetch())
+        _catalog_inflight[url] = task
+        task.add_done_callback(lambda _: _catalog_inflight.pop(url, None))
+
+    # shielded: a cancelled request must not cancel the fetch other requests await
+    result = await asyncio.shield(task)
+    if result is None:
+        return []
+    _catalog_cache.set(url, result)
+    return result
+
+
+async def read_json(response: aiohttp.ClientResponse) -> Any:
+    raw = await response.read()
+    if len(raw) > MCPL_THREAD_PARSE_BYTES:
+        return await asyncio.to_thread(json.loads, raw)
+    return json.loads(raw)
 
 
 class ToolProps(BaseModel):
@@ -25,7 +101,7 @@ async def get_mcpl_tools(
         servers: List[MCPLServer]
 ) -> List[ChatTool]:
     """
-    Fetch chat tools from multiple MCPL servers concurrently.
+    Fetch chat tools from multiple MCPL servers concurrently, or from the catalog cache.
 
     Args:
         c_session: The aiohttp ClientSession to use for requests.
@@ -36,22 +112,25 @@ async def get_mcpl_tools(
         A list of ChatTool objects from all servers.
     """
 
-    async def fetch_from_server(server: MCPLServer) -> List[ChatTool]:
-        tools_url = f"{server.address}/tools"
+    async def fetch_from_server(server: MCPLServer, tools_url: str) -> Optional[List[ChatTool]]:
         try:
-            async with c_session.get(tools_url) as response:
+            async with c_session.get(tools_url, timeout=MCPL_LIST_TIMEOUT) as response:
                 if response.status == 200:
-                    server_tools_data = await response.json()
+                    server_tools_data = await read_json(response)
                     return [ChatTool.model_validate(tool) for tool in server_tools_data["tools"]]
                 else:
-                    error(f"Failed to fetch tools from {server.address}: {response.status}")
-                    return []
+                    error("Failed to fetch tools from %s: %s", server.address, response.status)
+                    return None
         except Exception as e:
-            exception(f"Error fetching tools from {server.address}: {str(e)}")
-            return []
+            exception("Error fetching tools from %s: %s", server.address, e)
+            return None
+
+    def fetch_cached(server: MCPLServer) -> Awaitable[List[ChatTool]]:
+        tools_url = f"{server.address}/tools"
+        return fetch_catalog_cached(tools_url, lambda: fetch_from_server(server, tools_url))
 
     # Execute all requests concurrently
-    results = await asyncio.gather(*[fetch_from_server(server) for server in servers])
+    results = await gather_bounded([fetch_cached(server) for server in servers])
 
     return list(chain.from_iterable(results))
 
@@ -61,7 +140,7 @@ async def get_mcpl_tool_props(
         servers: List[MCPLServer]
 ) -> List[ToolProps]:
     """
-    Fetch tool properties from multiple MCPL servers concurrently.
+    Fetch tool properties from multiple MCPL servers concurrently, or from the catalog cache.
 
     Args:
         c_session: The aiohttp ClientSession to use for requests.
@@ -72,23 +151,26 @@ async def get_mcpl_tool_props(
         A list of ToolProps objects from all servers.
     """
 
-    async def fetch_from_server(server: MCPLServer) -> List[ToolProps]:
-        props_url = f"{server.address}/tools-props"
+    async def fetch_from_server(server: MCPLServer, props_url: str) -> Optional[List[ToolProps]]:
         try:
-            async with c_session.get(props_url) as response:
+            async with c_session.get(props_url, timeout=MCPL_LIST_TIMEOUT) as response:
                 if response.status == 200:
-                    tool_props_data = await response.json()
+                    tool_props_data = await read_json(response)
                     tool_props = ToolPropsResponse.model_validate(tool_props_data)
                     return tool_props.props
                 else:
-                    error(f"Failed to fetch tool props from {server.address}: {response.status}")
-                    return []
+                    error("Failed to fetch tool props from %s: %s", server.address, response.status)
+                    return None
         except Exception as e:
-            exception(f"Error fetching tool props from {server.address}: {str(e)}")
-            return []
+            exception("Error fetching tool props from %s: %s", server.address, e)
+            return None
+
+    def fetch_cached(server: MCPLServer) -> Awaitable[List[ToolProps]]:
+        props_url = f"{server.address}/tools-props"
+        return fetch_catalog_cached(props_url, lambda: fetch_from_server(server, props_url))
 
     # Execute all requests concurrently
-    results = await asyncio.gather(*[fetch_from_server(server) for server in servers])
+    results = await gather_bounded([fetch_cached(server) for server in servers])
 
     return list(chain.from_iterable(results))
 
@@ -113,28 +195,33 @@ async def mcpl_tools_execute(
         A list of chat messages containing the tool responses.
     """
 
+    if not servers:
+        return []
+
+    # the same body goes to every server: serialized once, messages in one pydantic pass
+    payload = b'{"user_id":%d,"messages":%s}' % (user_id, CHAT_MESSAGES_ADAPTER.dump_json(messages))
+    headers = {"Content-Type": "application/json"}
+
     async def execute_on_server(server: MCPLServer) -> List[ChatMessage]:
         execute_url = f"{server.address}/tools-execute"
         try:
-            payload = {
-                "user_id": user_id,
-                "messages": [message.model_dump() for message in messages]
-            }
-            async with c_session.post(execute_url, json=payload) as response:
+            async with c_session.post(
+                    execute_url, data=payload, headers=headers, timeout=MCPL_EXECUTE_TIMEOUT
+            ) as response:
                 if response.status == 200:
-                    response_data = await response.json()
+                    response_data = await read_json(response)
                     return [
                         model_validate_chat_message(msg)
                         for msg in response_data["tool_res_messages"]
                     ]
                 else:
-                    error(f"Failed to execute tools from {server.address}: {response.status}")
+                    error("Failed to execute tools from %s: %s", server.address, response.status)
                     return []
         except Exception as e:
-            exception(f"Error executing tools from {server.address}: {str(e)}")
+            exception("Error executing tools from %s: %s", server.address, e)
             return []
 
     # Execute all requests concurrently
-    results = await asyncio.gather(*[execute_on_server(server) for server in servers])
+    results = await gather_bounded([execute_on_server(server) for server in servers])
 
     return list(chain.from_iterable(results))
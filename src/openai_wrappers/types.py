@@ -1,8 +1,12 @@
-from typing import List, Optional, Union, Literal, Dict, Any
-from pydantic import BaseModel, Field, confloat, conint
+from typing import List, Optional, Union, Literal, Dict, Any, Annotated
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 
-type ChatMessage = Union[ChatMessageSystem, ChatMessageUser, ChatMessageAssistant, ChatMessageTool]
+# Tagged by role: pydantic picks the member from the role value instead of trying each one
+type ChatMessage = Annotated[
+    Union[ChatMessageSystem, ChatMessageUser, ChatMessageAssistant, ChatMessageTool],
+    Field(discriminator="role")
+]
 
 
 def model_validate_chat_message(obj: Union[Dict[str, Any], BaseModel]) -> ChatMessage:
@@ -13,18 +17,7 @@ def model_validate_chat_message(obj: Union[Dict[str, Any], BaseModel]) -> ChatMe
     if not isinstance(obj, dict):
         obj = obj.model_dump()
 
-    role = obj.get("role")
-
-    if role in ["system", "developer"]:
-        return ChatMessageSystem.model_validate(obj)
-    elif role == "user":
-        return ChatMessageUser.model_validate(obj)
-    elif role == "assistant":
-        return ChatMessageAssistant.model_validate(obj)
-    elif role == "tool":
-        return ChatMessageTool.model_validate(obj)
-    else:
-        raise ValueError(f"Unknown role: {role}")
+    return CHAT_MESSAGE_ADAPTER.validate_python(obj)
 
 
 class ChatToolParameterProperty(BaseModel):
@@ -104,11 +97,15 @@ class ChatMessageUser(ChatMessageBase):
 
 
 class ToolCallFunction(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str
     arguments: str
 
 
 class ToolCall(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     type: Literal["function"]
     function: ToolCallFunction
@@ -152,15 +149,15 @@ def default_modalities() -> List[str]:
 class ChatPost(BaseModel):
     # Required fields
     model: str
-    messages: List[Union[ChatMessageSystem, ChatMessageUser, ChatMessageAssistant, ChatMessageTool]]
+    messages: List[ChatMessage]
 
     # Optional fields with defaults
-    temperature: Optional[confloat(ge=0, le=2)] = Field(default=1)
-    top_p: Optional[confloat(ge=0, le=1)] = Field(default=1)
-    n: Optional[conint(ge=1)] = Field(default=1)
+    temperature: Optional[Annotated[float, Field(ge=0, le=2)]] = Field(default=1)
+    top_p: Optional[Annotated[float, Field(ge=0, le=1)]] = Field(default=1)
+    n: Optional[Annotated[int, Field(ge=1)]] = Field(default=1)
     stream: Optional[bool] = Field(default=False)
-    presence_penalty: Optional[confloat(ge=-2, le=2)] = Field(default=0)
-    frequency_penalty: Optional[confloat(ge=-2, le=2)] = Field(default=0)
+    presence_penalty: Optional[Annotated[float, Field(ge=-2, le=2)]] = Field(default=0)
+    frequency_penalty: Optional[Annotated[float, Field(ge=-2, le=2)]] = Field(default=0)
 
     # Optional fields without defaults
     stop: Optional[Union[str, List[str]]] = None
@@ -172,8 +169,8 @@ class ChatPost(BaseModel):
     reasoning_effort: Optional[Literal["low", "medium", "high"]] = Field(default="medium")
     metadata: Optional[dict[str, str]] = None
     logprobs: Optional[bool] = Field(default=False)
-    top_logprobs: Optional[conint(ge=0, le=20)] = None
-    max_completion_tokens: Optional[conint(ge=1)] = None
+    top_logprobs: Optional[Annotated[int, Field(ge=0, le=20)]] = None
+    max_completion_tokens: Optional[Annotated[int, Field(ge=1)]] = None
     modalities: Optional[List[str]] = Field(default_factory=default_modalities)
     prediction: Optional[dict] = None
     audio: Optional[dict] = None
@@ -186,6 +183,10 @@ class ChatPost(BaseModel):
     parallel_tool_calls: Optional[bool] = Field(default=True)
 
     # Deprecated fields
-    max_tokens: Optional[conint(ge=1)] = Field(default=None, deprecated=True)
+    max_tokens: Optional[Annotated[int, Field(ge=1)]] = Field(default=None, deprecated=True)
     functions: Optional[List[ChatFunction]] = Field(default=None, deprecated=True)
     function_call: Optional[Union[str, dict]] = Field(default=None, deprecated=True)
+
+
+CHAT_MESSAGE_ADAPTER: TypeAdapter[ChatMessage] = TypeAdapter(ChatMessage)
+CHAT_MESSAGES_ADAPTER: TypeAdapter[List[ChatMessage]] = TypeAdapter(List[ChatMessage])
@@ -16,24 +16,27 @@ def convert_messages_for_openai_format(messages: List[ChatMessage]) -> List[Chat
         messages: A list of ChatMessage objects to be converted
 
     Returns:
-        A new list of ChatMessage objects formatted for OpenAI's API
+        A new list of ChatMessage objects formatted for OpenAI's API;
+        messages that need no change are the original objects
     """
     result = []
     for message in messages:
-        new_message = message.model_copy()
-        if not isinstance(message.content, str):
-            new_content = []
-            for c in message.content:
-                if isinstance(c, ChatMessageContentItemDocSearch):
-                    new_content.append(ChatMessageContentItemText(
-                        text=json.dumps({
-                            "text": c.text,
-                            "id": c.paragraph_id,
-                        }),
-                        type="text"
-                    ))
-                else:
-                    new_content.append(c)
-            new_message.content = new_content
-        result.append(new_message)
+        # messages without doc search items need no change: pass them through as they are
+        if isinstance(message.content, str) or not any(
+                isinstance(c, ChatMessageContentItemDocSearch) for c in message.content
+        ):
+            result.append(message)
+            continue
+
+        new_content = [
+            ChatMessageContentItemText(
+                text=json.dumps({
+                    "text": c.text,
+                    "id": c.paragraph_id,
+                }),
+                type="text"
+            ) if isinstance(c, ChatMessageContentItemDocSearch) else c
+            for c in message.content
+        ]
+        result.append(message.model_copy(update={"content": new_content}))
     return result
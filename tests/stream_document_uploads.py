@@ -21,6 +21,7 @@ def stream_upload_document(file_path):
     def file_generator():
         bytes_sent = 0
         start_time = time.time()
+        last_print = 0.0
 
         with open(file_path, 'rb') as f:
             while True:
@@ -29,8 +30,11 @@ def stream_upload_document(file_path):
                     break
 
                 bytes_sent += len(chunk)
-                elapsed = time.time() - start_time
-                if elapsed > 0:  # Avoid division by zero
+                now = time.time()
+                elapsed = now - start_time
+                # Throttled: printing on every chunk would cost more than sending it
+                if elapsed > 0 and (now - last_print >= progress_interval or bytes_sent == file_size):
+                    last_print = now
                     speed = bytes_sent / elapsed / 1024 / 1024  # MB/s
                     percent = (bytes_sent / file_size) * 100
                     print(f"\rUploading: {percent:.1f}% ({bytes_sent}/{file_size} bytes) at {speed:.2f} MB/s", end="")
@@ -60,7 +64,8 @@ def stream_upload_document(file_path):
 
 
 file_path = Path(__file__).parent / "assets" / "resume-valerii.pdf"
-chunk_size = 1024
+chunk_size = 1 << 20
+progress_interval = 0.25  # seconds between progress lines
 
 
 if __name__ == "__main__":